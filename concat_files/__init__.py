@@ -0,0 +1,3 @@
+from concat_files.core import run
+
+__all__ = ["run"]
@@ -0,0 +1,5 @@
+import sys
+
+from concat_files.core import run
+
+run(sys.argv[1:])
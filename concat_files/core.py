@@ -0,0 +1,576 @@
+"""
+Core of concat-files: combines text files into one file with structured separators.
+
+The CLI shim (concat-files.py) and `python -m concat_files` both call run(argv).
+Path lookups are kept in module-level caches that run() resets on every call. With
+reuse_caches=True a long-lived process keeps only the directory scans and list-file
+reads, which are keyed on mtime and re-done as soon as the directory or file changes.
+"""
+
+
+import os
+
+import argparse
+import stat
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Optional
+
+START_SEP = "<<<BLOCK_START>>>"
+END_SEP = "<<<BLOCK_END>>>"
+REQUEST_START_SEP = "<<<BLOCK_START>>> REQUEST_BODY"
+REQUEST_END_SEP = "<<<BLOCK_END>>> REQUEST_BODY"
+REQUEST_HEADER_START_SEP = "<<<BLOCK_START>>> REQUEST_HEADER"
+REQUEST_HEADER_END_SEP = "<<<BLOCK_END>>> REQUEST_HEADER"
+
+START_SEP_B = START_SEP.encode('utf-8')
+END_SEP_B = END_SEP.encode('utf-8')
+REQUEST_START_SEP_B = REQUEST_START_SEP.encode('utf-8')
+REQUEST_END_SEP_B = REQUEST_END_SEP.encode('utf-8')
+REQUEST_HEADER_START_SEP_B = REQUEST_HEADER_START_SEP.encode('utf-8')
+REQUEST_HEADER_END_SEP_B = REQUEST_HEADER_END_SEP.encode('utf-8')
+
+DEFAULT_CODES_MAPPING_FILE = "file-codes.txt"
+DEFAULT_OUTPUT_FILE = "OUTPUT.txt"
+DEFAULT_WORK_FILE = "work.txt"
+SENDFILE_MIN_SIZE = 64 * 1024
+PREFETCH_WINDOW = 8
+COPY_BUFSIZE = 1024 * 1024
+SHARD_MIN_FILES = 200
+
+ERROR_APPEND_STRING = (
+    "The REQUEST_BODY contains console output with the error that needs to be solved.\n"
+)
+ERROR_APPEND_STRING_B = ERROR_APPEND_STRING.encode('utf-8')
+
+# Outputs and the fallback work.txt live next to concat-files.py, one level above this package.
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# path -> (stamp, value); kept across run(reuse_caches=True) calls.
+_dir_scans = {}
+_text_lines = {}
+
+@dataclass
+class PlanEntry:
+    __slots__ = ('name', 'path', 'size', 'exists')
+    name: str
+    path: str
+    size: Optional[int]
+    exists: bool
+
+def build_plan(input_files):
+    # One stat per input up front; the write phase never touches file metadata again.
+    plan = []
+    for file_path in input_files:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        exists = st is not None and stat.S_ISREG(st.st_mode)
+        plan.append(PlanEntry(
+            name=os.path.basename(file_path),
+            path=file_path,
+            size=st.st_size if exists else None,
+            exists=exists,
+        ))
+    return plan
+
+def block_frame(name):
+    display_name = name.encode('utf-8')
+    start = b"".join((START_SEP_B, b" ", display_name, b"\n"))
+    end = b"".join((b"\n", END_SEP_B, b" ", display_name, b"\n\n"))
+    return start, end
+
+def missing_file_marker(file_path):
+    return f"[Warning: file '{file_path}' not found]\n".encode('utf-8')
+
+def planned_output_size(plan, request_file_path=None, request_header=None, append_error=False):
+    total = 0
+    if request_header:
+        total += len(REQUEST_HEADER_START_SEP_B) + 1 + 1 + len(REQUEST_HEADER_END_SEP_B) + 2
+        if append_error:
+            total += 1 + len(ERROR_APPEND_STRING_B)
+        if os.path.isfile(request_header):
+            total += os.path.getsize(request_header)
+        else:
+            total += len(request_header.encode('utf-8'))
+    if request_file_path and os.path.isfile(request_file_path):
+        total += len(REQUEST_START_SEP_B) + 1 + os.path.getsize(request_file_path) + len(REQUEST_END_SEP_B) + 2
+    for entry in plan:
+        start, end = block_frame(entry.name)
+        total += len(start) + len(end)
+        total += entry.size if entry.exists else len(missing_file_marker(entry.path))
+    return total
+
+def preallocate(out_fd, size):
+    # Reserve the extents up front; platforms and filesystems without fallocate just skip it.
+    if size and hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(out_fd, 0, size)
+            return True
+        except OSError:
+            pass
+    return False
+
+def emit_text_or_file(out_fd, value):
+    if value and os.path.isfile(value):
+        copy_file_contents(out_fd, value)
+    else:
+        write_buffers(out_fd, [value.encode('utf-8')])
+
+def combine_files(plan, output_file, request_file_path=None, request_header=None, append_error=False):
+    with open(output_file, 'wb', buffering=0) as outfile:
+        out_fd = outfile.fileno()
+        preallocated = preallocate(
+            out_fd, planned_output_size(plan, request_file_path, request_header, append_error)
+        )
+        try:
+            if request_header:
+                write_buffers(out_fd, [REQUEST_HEADER_START_SEP_B + b"\n"])
+                emit_text_or_file(out_fd, request_header)
+                tail = [b"\n"]
+                if append_error:
+                    tail.append(b"\n" + ERROR_APPEND_STRING_B)
+                tail.append(REQUEST_HEADER_END_SEP_B + b"\n\n")
+                write_buffers(out_fd, tail)
+            if request_file_path and os.path.isfile(request_file_path):
+                write_buffers(out_fd, [REQUEST_START_SEP_B + b"\n"])
+                copy_file_contents(out_fd, request_file_path)
+                write_buffers(out_fd, [REQUEST_END_SEP_B + b"\n\n"])
+
+            shard_workers = min(os.cpu_count() or 1, len(plan))
+            if (
+                len(plan) >= SHARD_MIN_FILES
+                and shard_workers >= 2
+                and stat.S_ISREG(os.fstat(out_fd).st_mode)
+            ):
+                write_sharded(out_fd, plan, shard_workers, os.path.dirname(os.path.abspath(output_file)))
+            else:
+                with ThreadPoolExecutor(max_workers=PREFETCH_WINDOW) as executor:
+                    contents = prefetch(executor, read_block_content, plan, PREFETCH_WINDOW)
+                    write_entries(out_fd, plan, contents)
+        finally:
+            if preallocated:
+                # Inputs may have changed since planning, or writing failed part-way;
+                # either way drop the unused reserved tail instead of leaving NUL padding.
+                os.ftruncate(out_fd, os.lseek(out_fd, 0, os.SEEK_CUR))
+
+def write_entries(out_fd, entries, contents):
+    pending = b""
+    for entry, content in zip(entries, contents):
+        pending = write_file_block(out_fd, entry, content, pending)
+    write_buffers(out_fd, [pending])
+
+def write_sharded(out_fd, plan, workers, tmp_parent):
+    # Contiguous slices are combined in parallel into temp shards, then appended in order,
+    # so the output is byte-for-byte what a single sequential pass would write.
+    chunk_size = -(-len(plan) // workers)
+    shards = [plan[i:i + chunk_size] for i in range(0, len(plan), chunk_size)]
+    with make_shard_dir(tmp_parent) as tmp_dir:
+        shard_paths = [os.path.join(tmp_dir, f"shard_{i}.txt") for i in range(len(shards))]
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(write_shard, shard_path, entries)
+                for shard_path, entries in zip(shard_paths, shards)
+            ]
+            for future in futures:
+                future.result()
+        for shard_path in shard_paths:
+            copy_file_contents(out_fd, shard_path)
+
+def make_shard_dir(tmp_parent):
+    # Next to the output by default; a writable output can still sit in a read-only directory.
+    try:
+        return tempfile.TemporaryDirectory(dir=tmp_parent)
+    except OSError:
+        return tempfile.TemporaryDirectory()
+
+def write_shard(shard_path, entries):
+    with open(shard_path, 'wb', buffering=0) as shard:
+        write_entries(shard.fileno(), entries, map(read_block_content, entries))
+
+def prefetch(executor, func, items, window):
+    # Keep up to `window` calls in flight and yield their results in input order.
+    items = iter(items)
+    pending = deque(executor.submit(func, item) for item in islice(items, window))
+    while pending:
+        future = pending.popleft()
+        for item in islice(items, 1):
+            pending.append(executor.submit(func, item))
+        yield future.result()
+
+def read_block_content(entry):
+    # Returns the bytes to emit, or None for large files that are streamed with sendfile.
+    if not entry.exists:
+        return missing_file_marker(entry.path)
+    if entry.size >= SENDFILE_MIN_SIZE:
+        return None
+    with open(entry.path, 'rb') as infile:
+        advise_read_start(infile.fileno())
+        data = infile.read()
+        advise_read_done(infile.fileno())
+    return data
+
+def advise_read_start(fd):
+    # Readahead hints only; platforms without posix_fadvise (Windows, macOS) skip them.
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+
+def advise_read_done(fd):
+    # Each input is read once, so let the kernel drop its pages instead of keeping them cached.
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def write_file_block(out_fd, entry, content, pending=b""):
+    # Sends the previous block's END line with this START line and returns this block's END line.
+    start, end = block_frame(entry.name)
+    if content is not None:
+        write_buffers(out_fd, [pending, start, content])
+    else:
+        write_buffers(out_fd, [pending, start])
+        copy_file_contents(out_fd, entry.path)
+    return end
+
+def write_buffers(out_fd, buffers):
+    # One gather write per block; a short write is finished with plain writes.
+    if hasattr(os, 'writev'):
+        written = os.writev(out_fd, buffers)
+        if written == sum(map(len, buffers)):
+            return
+        data = b"".join(buffers)[written:]
+    else:
+        data = b"".join(buffers)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(out_fd, view):]
+
+def copy_file_contents(out_fd, file_path):
+    # Copy in-kernel where sendfile() exists; plain read/write stays as the fallback (Windows).
+    if hasattr(os, 'sendfile'):
+        in_fd = os.open(file_path, os.O_RDONLY)
+        try:
+            advise_read_start(in_fd)
+            if sendfile_all(out_fd, in_fd, os.fstat(in_fd).st_size):
+                advise_read_done(in_fd)
+                return
+        finally:
+            os.close(in_fd)
+    with open(file_path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(COPY_BUFSIZE), b""):
+            write_buffers(out_fd, [chunk])
+
+def sendfile_all(out_fd, in_fd, size):
+    offset = 0
+    try:
+        while offset < size:
+            sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    except OSError:
+        if offset:
+            raise
+        return False
+    return True
+
+def get_files_from_folder(folder_path):
+    with os.scandir(folder_path) as entries:
+        return sorted(entry.path for entry in entries if entry.is_file())
+
+def expand_input_paths(paths):
+    for p in paths:
+        if os.path.isdir(p):
+            yield from get_files_from_folder(p)
+        else:
+            yield p
+
+def read_lines(file_path):
+    st = os.stat(file_path)
+    return read_text_lines(file_path, st.st_mtime_ns, st.st_size)
+
+def read_text_lines(file_path, mtime_ns, size):
+    # One entry per path, replaced when mtime or size changes, so reused caches stay bounded.
+    stamp = (mtime_ns, size)
+    cached = _text_lines.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(file_path, 'rb') as f:
+        lines = tuple(f.read().decode('utf-8').splitlines())
+    _text_lines[file_path] = (stamp, lines)
+    return lines
+
+def read_codes_mapping(mapping_file):
+    mapping = {}
+    for line in read_lines(mapping_file):
+        parts = line.strip().split(None, 1)
+        if len(parts) == 2:
+            code, path = parts
+            mapping[code] = path
+    return mapping
+
+def read_codes_list(codes_list_file):
+    return [code for code in (line.strip() for line in read_lines(codes_list_file)) if code]
+
+@lru_cache(maxsize=None)
+def cached_isfile(path):
+    return os.path.isfile(path)
+
+@lru_cache(maxsize=None)
+def index_dir(base_dir):
+    # One stat per directory per run; the scan itself is reused while the directory is unchanged.
+    try:
+        mtime_ns = os.stat(base_dir).st_mtime_ns
+    except OSError:
+        return frozenset()
+    return scan_dir(base_dir, mtime_ns)
+
+def scan_dir(base_dir, mtime_ns):
+    # One scandir per directory collects the normcased names of the regular files it holds;
+    # the entry is replaced, not added to, when the directory's mtime changes.
+    cached = _dir_scans.get(base_dir)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        with os.scandir(base_dir) as entries:
+            names = frozenset(os.path.normcase(entry.name) for entry in entries if entry.is_file())
+    except OSError:
+        names = frozenset()
+    _dir_scans[base_dir] = (mtime_ns, names)
+    return names
+
+def with_sep(path):
+    return path if path.endswith(os.sep) else path + os.sep
+
+def lookup_dir(dir_path):
+    return with_sep(dir_path), index_dir(dir_path)
+
+@lru_cache(maxsize=None)
+def cached_normpath(path):
+    return os.path.normpath(path)
+
+@lru_cache(maxsize=None)
+def cached_realpath(path):
+    return os.path.realpath(path)
+
+def drop_duplicate_files(input_files, duplicates):
+    seen = set()
+    for file_path in input_files:
+        real_path = cached_realpath(file_path)
+        if real_path in seen:
+            duplicates.append(file_path)
+        else:
+            seen.add(real_path)
+            yield file_path
+
+def drop_output_file(input_files, output_path, skipped):
+    # The output is truncated and preallocated before inputs are read, so it can never be one.
+    output_real = os.path.normcase(os.path.realpath(output_path))
+    for file_path in input_files:
+        if os.path.normcase(cached_realpath(file_path)) == output_real:
+            skipped.append(file_path)
+        else:
+            yield file_path
+
+def clear_path_caches(keep_scans=False):
+    # Existence checks are never carried across runs; only mtime-keyed results may be.
+    cached_isfile.cache_clear()
+    cached_normpath.cache_clear()
+    cached_realpath.cache_clear()
+    find_request_file.cache_clear()
+    find_work_file.cache_clear()
+    index_dir.cache_clear()
+    if not keep_scans:
+        _dir_scans.clear()
+        _text_lines.clear()
+
+def read_work_dirs(work_file):
+    if not cached_isfile(work_file):
+        return []
+    # Dedupe before validating so each directory is stat-ed once; the order sets search priority.
+    cwd = os.getcwd()
+    candidates = dict.fromkeys(
+        cached_normpath(os.path.join(cwd, d))
+        for d in (line.strip() for line in read_lines(work_file))
+        if d
+    )
+    return [d for d in candidates if os.path.isdir(d)]
+
+def resolve_file_paths(input_paths, base_dirs):
+    # Each candidate directory is scanned once; only names missing from every index are stat-ed.
+    base_dirs = [lookup_dir(base_dir) for base_dir in base_dirs]
+    cwd_prefix = with_sep(os.getcwd())
+    for p in input_paths:
+        if os.path.isabs(p) and cached_isfile(p):
+            yield p
+            continue
+
+        found = None
+        head, name = os.path.split(p)
+        key = os.path.normcase(name)
+        try_txt = not os.path.splitext(p)[1]
+        if not head:
+            candidates = base_dirs
+        elif os.path.isabs(head):
+            candidates = [lookup_dir(cached_normpath(head))]
+        else:
+            candidates = [lookup_dir(cached_normpath(prefix + head)) for prefix, _ in base_dirs]
+        # The index only answers "does it exist"; the result keeps the name as the user wrote it.
+        for dir_prefix, names in candidates:
+            if key in names:
+                found = dir_prefix + name
+                break
+            if try_txt and key + ".txt" in names:
+                found = dir_prefix + name + ".txt"
+                break
+        else:
+            # A miss is confirmed on disk: normcase is the identity on case-insensitive
+            # filesystems (macOS, casefolded ext4), where the index cannot match other spellings.
+            for dir_prefix, _ in candidates:
+                if cached_isfile(dir_prefix + name):
+                    found = dir_prefix + name
+                    break
+                if try_txt and cached_isfile(dir_prefix + name + ".txt"):
+                    found = dir_prefix + name + ".txt"
+                    break
+
+        if found is None:
+            abs_path = cached_normpath(p if os.path.isabs(p) else cwd_prefix + p)
+            if try_txt and cached_isfile(abs_path + ".txt"):
+                found = abs_path + ".txt"
+            else:
+                found = abs_path
+        yield found
+
+@lru_cache(maxsize=None)
+def find_request_file(initial_request, input_dir, work_dirs):
+    if input_dir:
+        candidate = os.path.join(input_dir, "request.txt")
+        if cached_isfile(candidate):
+            return candidate
+    if initial_request:
+        found = next(resolve_file_paths([initial_request], base_dirs=work_dirs))
+        if cached_isfile(found):
+            return found
+    for d in work_dirs:
+        candidate = os.path.join(d, "request.txt")
+        if cached_isfile(candidate):
+            return candidate
+    return None
+
+@lru_cache(maxsize=None)
+def find_work_file(initial_work, input_dir, script_dir):
+    if input_dir:
+        candidate = os.path.join(input_dir, "work.txt")
+        if cached_isfile(candidate):
+            return candidate
+    if initial_work and cached_isfile(initial_work):
+        return initial_work
+    candidate = os.path.join(script_dir, "work.txt")
+    if cached_isfile(candidate):
+        return candidate
+    return initial_work
+
+def run(argv=None, reuse_caches=False):
+    clear_path_caches(keep_scans=reuse_caches)
+    parser = argparse.ArgumentParser(
+        description="Combine text files into one with structured separators."
+    )
+    parser.add_argument('-p', '--paths', nargs='+', help="Files and/or directory paths")
+    parser.add_argument('-i', '--input-dir', nargs='?', help="Directory with working files: files.txt, header.txt, request")
+    parser.add_argument('-c', '--codes', nargs='?', help="File containing list of codes to map to file paths")
+    parser.add_argument('-m', '--mapping', default=None, help=f"Codes mapping file (default: {DEFAULT_CODES_MAPPING_FILE})")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_FILE, help=f"Output filename (default: {DEFAULT_OUTPUT_FILE})")
+    parser.add_argument('-r', '--request', nargs='?', const=None, default=None, help="Request file to prepend")
+    parser.add_argument('-w', '--work', default=DEFAULT_WORK_FILE, help=f"File containing list of root directories (default: {DEFAULT_WORK_FILE})")
+    parser.add_argument('-rh', '--header', default=None, help="Optional request header content or file to prepend")
+    parser.add_argument('-e', '--error', action='store_true', help="Append predefined error string to request.txt section")
+    args = parser.parse_args(argv)
+
+    work_dirs = []
+    input_dir_abs = None
+    if args.input_dir:
+        input_dir_abs = os.path.abspath(args.input_dir)
+        if os.path.isdir(input_dir_abs):
+            args.codes = os.path.join(input_dir_abs, "files.txt")
+            args.header = os.path.join(input_dir_abs, "header.txt")
+        else:
+            print(f"Error: input directory '{args.input_dir}' not found.")
+            sys.exit(1)
+
+    script_dir = SCRIPT_DIR
+    args.work = find_work_file(args.work, input_dir_abs, script_dir)
+
+    if not args.paths and not args.codes:
+        print("Error: You must specify either -p (paths), -i (input-dir), or -c (codes).")
+        sys.exit(1)
+
+    work_dirs = read_work_dirs(args.work)
+    if not work_dirs:
+        print(f"Warning: No valid directories found in '{args.work}', using current directory only.")
+        work_dirs = [os.getcwd()]
+
+    request_file_path = find_request_file(args.request, input_dir_abs, tuple(work_dirs))
+    if not request_file_path:
+        print("Warning: No request.txt file found in input-dir or work directories.")
+
+    input_files = ()
+
+    if args.codes:
+        codes_list_path = next(resolve_file_paths([args.codes], base_dirs=work_dirs))
+        if not cached_isfile(codes_list_path):
+            print(f"Error: codes list file '{args.codes}' not found in work directories.")
+            sys.exit(1)
+        codes = read_codes_list(codes_list_path)
+
+        mapping_file = args.mapping or DEFAULT_CODES_MAPPING_FILE
+        mapping_path = next(resolve_file_paths([mapping_file], base_dirs=work_dirs))
+        if not cached_isfile(mapping_path):
+            print(f"Error: mapping file '{mapping_file}' not found in work directories.")
+            sys.exit(1)
+        mapping = read_codes_mapping(mapping_path)
+
+        missing_codes = [code for code in codes if code not in mapping]
+        if missing_codes:
+            print("Error: the following codes are missing in the mapping file:")
+            for c in missing_codes:
+                print(f"  - {c}")
+            sys.exit(1)
+
+        input_files = resolve_file_paths((mapping[code] for code in codes), base_dirs=work_dirs)
+
+    elif args.paths:
+        input_files = resolve_file_paths(expand_input_paths(args.paths), base_dirs=work_dirs)
+
+    output_path = os.path.join(script_dir, args.output)
+
+    # Paths are resolved, deduplicated and stat-ed in one streaming pass; only the plan is kept.
+    duplicates = []
+    skipped_output = []
+    plan = build_plan(drop_output_file(
+        drop_duplicate_files(input_files, duplicates), output_path, skipped_output
+    ))
+    if duplicates:
+        print(f"Warning: skipped {len(duplicates)} duplicate file(s).")
+    if skipped_output:
+        print(f"Warning: skipped output file '{output_path}' listed among the inputs.")
+
+    combine_files(
+        plan,
+        output_path,
+        request_file_path=request_file_path,
+        request_header=args.header,
+        append_error=args.error
+    )
+    print(f"Successfully created {output_path} from {len(plan)} files.")
+
+def main():
+    run(sys.argv[1:])
+
+if __name__ == "__main__":
+    main()